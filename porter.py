@@ -6,15 +6,19 @@ Author: Vahe Demirkhanyan
 
 import argparse
 import asyncio
-import contextlib
 import errno
 import ipaddress
+import multiprocessing
 import os
+import queue as _queue
+import select
 import socket
+import struct
 import sys
 import time
+from array import array
 from collections import defaultdict
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 
 # ---------- Optional deps ----------
@@ -24,6 +28,26 @@ try:
 except ImportError:
     _COLORAMA = False
 
+try:
+    if sys.platform == "win32":
+        import winloop as _fastloop
+    else:
+        import uvloop as _fastloop
+except ImportError:
+    _fastloop = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import aiodns
+    if not hasattr(aiodns.DNSResolver, "getaddrinfo"):
+        aiodns = None
+except ImportError:
+    aiodns = None
+
 # ---------- Globals ----------
 _COLOR = False
 _IS_TTY = False
@@ -41,11 +65,39 @@ def _c_bold(t):    return (Style.BRIGHT + t + Style.RESET_ALL) if _COLOR else t
 # ═══════════════════════════════════════════════════════════════
 
 _SERVICE_CACHE: Dict[int, str] = {}
+_SERVICES_LOADED = False
+
+
+def _services_path() -> str:
+    if sys.platform == "win32":
+        root = os.environ.get("SystemRoot", r"C:\Windows")
+        return os.path.join(root, "System32", "drivers", "etc", "services")
+    return "/etc/services"
+
+
+def _load_services() -> bool:
+    # First name listed for a tcp port wins, matching getservbyport().
+    try:
+        with open(_services_path(), "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) < 2:
+                    continue
+                port_s, _, proto = fields[1].partition("/")
+                if proto.lower() != "tcp" or not port_s.isdigit():
+                    continue
+                _SERVICE_CACHE.setdefault(int(port_s), fields[0])
+    except OSError:
+        return False
+    return True
 
 
 def _svc(port: int) -> str:
-    if port in _SERVICE_CACHE:
-        return _SERVICE_CACHE[port]
+    name = _SERVICE_CACHE.get(port)
+    if name is not None:
+        return name
+    if _SERVICES_LOADED:
+        return ""
     try:
         name = socket.getservbyport(port, "tcp")
     except (OSError, OverflowError):
@@ -55,6 +107,12 @@ def _svc(port: int) -> str:
 
 
 def _warm_service_cache(ports: List[int]):
+    global _SERVICES_LOADED
+    if not _SERVICES_LOADED:
+        _SERVICES_LOADED = _load_services()
+    if _SERVICES_LOADED:
+        return
+    # No readable services file: fall back to per-port system lookups
     for p in ports:
         _svc(p)
 
@@ -75,6 +133,8 @@ POPULAR_PORTS = [
     853, 8530, 4369, 5432, 27018, 27019, 25565
 ]
 
+_PORT_SPACE = 65536
+
 TOP1000_SPEC = (
     "1,3-4,6-7,9,13,17,19-26,30,32-33,37,42-43,49,53,70,79-85,88-90,99-100,"
     "106,109-111,113,119,125,135,139,143-144,146,161,163,179,199,211-212,222,"
@@ -130,12 +190,32 @@ TOP1000_SPEC = (
 #  Target/port parsing
 # ═══════════════════════════════════════════════════════════════
 
-def expand_targets(arg: str) -> List[str]:
+_OCTETS = [str(i) for i in range(256)]
+
+
+def expand_targets(arg: str) -> Iterator[str]:
     try:
         net = ipaddress.ip_network(arg, strict=False)
-        return [str(ip) for ip in net.hosts()]
     except ValueError:
-        return [arg.strip()]
+        yield arg.strip()
+        return
+    if not isinstance(net, ipaddress.IPv4Network):
+        for ip in net.hosts():
+            yield str(ip)
+        return
+
+    # Same hosts as net.hosts(), built from integer arithmetic
+    lo = int(net.network_address)
+    hi = int(net.broadcast_address)
+    if net.prefixlen < 31:
+        lo += 1
+        hi -= 1
+    for blk in range(lo >> 8, (hi >> 8) + 1):
+        prefix = f"{blk >> 16}.{(blk >> 8) & 255}.{blk & 255}."
+        first = max(lo, blk << 8) & 255
+        last = min(hi, (blk << 8) | 255) & 255
+        for octet in _OCTETS[first:last + 1]:
+            yield prefix + octet
 
 
 def _expand_ipv4_last_octet_range(token: str) -> List[str]:
@@ -166,26 +246,45 @@ def _expand_ipv4_last_octet_range(token: str) -> List[str]:
     return [f"{left}.{i}" for i in range(a, b + 1)]
 
 
+def _expand_token(tok: str) -> Iterator[str]:
+    if "/" in tok:
+        return expand_targets(tok)
+    return iter(_expand_ipv4_last_octet_range(tok))
+
+
 def parse_target_arg(arg: str) -> List[str]:
+    tokens = [t for t in (raw.strip() for raw in arg.split(",")) if t]
+    if len(tokens) == 1:
+        # One CIDR or range never repeats an address: no seen-set needed
+        return list(_expand_token(tokens[0]))
+
+    seen: Set[str] = set()
     out: List[str] = []
-    for raw in arg.split(","):
-        tok = raw.strip()
-        if not tok:
-            continue
-        if "/" in tok:
-            out.extend(expand_targets(tok))
-            continue
-        out.extend(_expand_ipv4_last_octet_range(tok))
-    return list(dict.fromkeys(out))
+    for tok in tokens:
+        for ip in _expand_token(tok):
+            if ip not in seen:
+                seen.add(ip)
+                out.append(ip)
+    return out
+
+
+_TOP1000_PORTS: Optional[List[int]] = None
 
 
 def parse_ports(spec: str) -> List[int]:
+    global _TOP1000_PORTS
     if spec == "popular":
         return list(dict.fromkeys(POPULAR_PORTS))
     if spec in {"top", "top1000", "nmap"}:
-        spec = TOP1000_SPEC
+        if _TOP1000_PORTS is None:
+            _TOP1000_PORTS = _parse_port_spec(TOP1000_SPEC)
+        return list(_TOP1000_PORTS)
+    return _parse_port_spec(spec)
 
-    ports: Set[int] = set()
+
+def _parse_port_spec(spec: str) -> List[int]:
+    # One byte per possible port; the final scan comes out sorted
+    bits = bytearray(_PORT_SPACE)
     for part in spec.split(","):
         part = part.strip()
         if not part:
@@ -195,15 +294,41 @@ def parse_ports(spec: str) -> List[int]:
             a, b = int(a), int(b)
             if a > b:
                 a, b = b, a
-            ports.update(range(a, b + 1))
+            _check_port(a)
+            _check_port(b)
+            bits[a:b + 1] = b"\x01" * (b - a + 1)
         else:
-            ports.add(int(part))
-    return sorted(ports)
+            p = int(part)
+            _check_port(p)
+            bits[p] = 1
+
+    # Walk runs of set bytes with find() instead of testing every port
+    out: List[int] = []
+    find = bits.find
+    a = find(1)
+    while a >= 0:
+        b = find(0, a)
+        if b < 0:
+            b = _PORT_SPACE
+        out.extend(range(a, b))
+        a = find(1, b)
+    return out
+
+
+def _check_port(p: int):
+    if not 0 <= p < _PORT_SPACE:
+        raise ValueError(f"port out of range: {p}")
+
+
+# Sort key per port: popular ports by list position, then the rest
+_PORT_RANK = array("i", range(len(POPULAR_PORTS), len(POPULAR_PORTS) + _PORT_SPACE))
+for _i, _p in enumerate(POPULAR_PORTS):
+    _PORT_RANK[_p] = _i
+del _i, _p
 
 
 def order_ports(ports: List[int]) -> List[int]:
-    rank = {p: i for i, p in enumerate(POPULAR_PORTS)}
-    return sorted(ports, key=lambda p: (0, rank[p]) if p in rank else (1, p))
+    return sorted(ports, key=_PORT_RANK.__getitem__)
 
 
 def _describe_port_spec(spec: str, count: int) -> str:
@@ -220,21 +345,113 @@ def _describe_port_spec(spec: str, count: int) -> str:
 #  DNS resolver
 # ═══════════════════════════════════════════════════════════════
 
+# TTL for answers that carry none; failed lookups are never cached
+_DNS_DEFAULT_TTL = 300.0
+_DNS_CACHE_MAX = 4096
+# Hostname lookups in flight at once during resolve_all()
+_DNS_CONCURRENCY = 64
+
+_IPV6_ROUTABLE: Optional[bool] = None
+
+
+def _ipv6_routable() -> bool:
+    # Stand-in for AI_ADDRCONFIG: a UDP connect() sends no packet
+    global _IPV6_ROUTABLE
+    if _IPV6_ROUTABLE is None:
+        try:
+            with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as s:
+                s.connect(("2001:db8::1", 9))
+            _IPV6_ROUTABLE = True
+        except OSError:
+            _IPV6_ROUTABLE = False
+    return _IPV6_ROUTABLE
+
+
+def _collect_ips(addrs) -> List[str]:
+    # (family, address) pairs -> unique addresses, IPv4 first
+    v4, v6 = [], []
+    for fam, ip in addrs:
+        if fam == socket.AF_INET:
+            v4.append(ip)
+        elif fam == socket.AF_INET6:
+            v6.append(ip)
+    return list(dict.fromkeys(v4 + v6))
+
+
 class Resolver:
     def __init__(self) -> None:
-        self._cache: Dict[str, List[str]] = {}
+        # target -> (monotonic expiry, addresses), oldest entry evicted first
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._ares = None
+        # Cleared once c-ares fails outright; the system resolver takes over
+        self._use_ares = aiodns is not None
+
+    def _store(self, target: str, ips: List[str], ttl: float) -> List[str]:
+        cache = self._cache
+        if target not in cache and len(cache) >= _DNS_CACHE_MAX:
+            del cache[next(iter(cache))]
+        cache[target] = (time.monotonic() + ttl, ips)
+        return ips
 
-    async def resolve(self, target: str) -> List[str]:
-        if target in self._cache:
-            return self._cache[target]
+    def resolve_cached(self, target: str) -> Optional[List[str]]:
+        # Cache or numeric parsing only; None means DNS is needed
+        try:
+            socket.inet_pton(_ip_family(target), target)
+            return [target]
+        except OSError:
+            pass
+
+        hit = self._cache.get(target)
+        if hit is not None:
+            if hit[0] > time.monotonic():
+                return hit[1]
+            del self._cache[target]
 
         try:
-            ipaddress.ip_address(target)
-            self._cache[target] = [target]
-            return self._cache[target]
+            ipaddress.ip_address(target)  # scoped IPv6, e.g. fe80::1%eth0
+            return [target]
         except ValueError:
             pass
 
+        # Numeric forms ipaddress rejects (e.g. "127.1") never hit DNS
+        try:
+            infos = socket.getaddrinfo(
+                target,
+                None,
+                socket.AF_UNSPEC,
+                socket.SOCK_STREAM,
+                socket.IPPROTO_TCP,
+                socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+            )
+            return _collect_ips((i[0], i[4][0]) for i in infos)
+        except socket.gaierror:
+            return None
+
+    async def _lookup_ares(self, target: str) -> Tuple[List[str], float]:
+        # c-ares reports each record's TTL and needs no executor thread
+        try:
+            if self._ares is None:
+                self._ares = aiodns.DNSResolver()
+            res = await self._ares.getaddrinfo(target, family=socket.AF_UNSPEC,
+                                               type=socket.SOCK_STREAM)
+        except aiodns.error.DNSError:
+            return [], 0.0
+        except Exception:
+            self._use_ares = False
+            return [], 0.0
+        v6_ok = _ipv6_routable()
+        addrs = []
+        ttls = []
+        for node in res.nodes:
+            if node.family == socket.AF_INET6 and not v6_ok:
+                continue
+            ip = node.addr[0]
+            addrs.append((node.family, ip.decode() if isinstance(ip, bytes) else ip))
+            if node.ttl > 0:
+                ttls.append(node.ttl)
+        return _collect_ips(addrs), float(min(ttls)) if ttls else _DNS_DEFAULT_TTL
+
+    async def _lookup_system(self, target: str) -> List[str]:
         loop = asyncio.get_running_loop()
         try:
             infos = await loop.getaddrinfo(
@@ -245,18 +462,23 @@ class Resolver:
                 proto=socket.IPPROTO_TCP,
                 flags=socket.AI_ADDRCONFIG,
             )
-            v4, v6 = [], []
-            for fam, _typ, _pro, _can, sa in infos:
-                ip = sa[0]
-                if fam == socket.AF_INET:
-                    v4.append(ip)
-                elif fam == socket.AF_INET6:
-                    v6.append(ip)
-            ips = list(dict.fromkeys(v4 + v6))
         except socket.gaierror:
-            ips = []
+            return []
+        return _collect_ips((i[0], i[4][0]) for i in infos)
 
-        self._cache[target] = ips
+    async def resolve(self, target: str) -> List[str]:
+        ips = self.resolve_cached(target)
+        if ips is not None:
+            return ips
+
+        ips, ttl = [], _DNS_DEFAULT_TTL
+        if self._use_ares:
+            ips, ttl = await self._lookup_ares(target)
+        # c-ares skips NSS (mDNS, LDAP, ...): let the system resolver try too
+        if not ips:
+            ips, ttl = await self._lookup_system(target), _DNS_DEFAULT_TTL
+        if ips:
+            self._store(target, ips, ttl)
         return ips
 
 
@@ -264,83 +486,327 @@ class Resolver:
 #  Connect probe
 # ═══════════════════════════════════════════════════════════════
 
-def _sock_family(ip: str) -> int:
-    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+# Probe outcomes, as small ints the workers compare on every probe
+OPEN, CLOSED, FILTERED, TIMEOUT, BACKOFF = range(5)
 
 
-def _jitter_seconds(ip: str, port: int) -> float:
-    x = 0
-    for ch in ip:
-        x = ((x << 5) - x) + ord(ch)
-        x &= 0xFFFFFFFF
-    x ^= (port * 2654435761) & 0xFFFFFFFF
-    return (x % 2001) / 1_000_000.0
+def _ip_family(ip: str) -> int:
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
 
 
 # Local / transient connect failures that should be retried
-_RETRYABLE_ERRNOS = {
+_RETRYABLE_ERRNOS = frozenset({
+    getattr(errno, "ETIMEDOUT", 110),
+    10060,  # WSAETIMEDOUT
+})
+
+# Local resource exhaustion: repeat the probe once pressure eases
+_BACKOFF_ERRNOS = frozenset({
     getattr(errno, "EADDRNOTAVAIL", 99),
     getattr(errno, "EADDRINUSE", 98),
     getattr(errno, "ENOBUFS", 105),
     getattr(errno, "EMFILE", 24),
     getattr(errno, "ENFILE", 23),
-    getattr(errno, "ETIMEDOUT", 110),
     # Windows WSA*
     10048,  # WSAEADDRINUSE
     10049,  # WSAEADDRNOTAVAIL
     10055,  # WSAENOBUFS
-    10060,  # WSAETIMEDOUT
     10024,  # WSAEMFILE
+})
+
+_REFUSED_ERRNOS = frozenset({errno.ECONNREFUSED, 10061})
+
+
+# Proactor (the Windows default loop) has no add_writer
+_RAW_CONNECT = sys.platform != "win32"
+_CONNECT_PENDING = frozenset({errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN})
+
+# Bound once: saves the asyncio attribute lookup on every timed-out probe
+_TimeoutError = asyncio.TimeoutError
+
+
+def _wake(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_result(None)
+
+
+def _expire(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_exception(_TimeoutError())
+
+
+_EPOLL = hasattr(select, "epoll")
+
+
+class _EpollWaiter:
+    # All pending handshakes in one private epoll set, watched as one reader
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._ep = select.epoll()
+        self._pending: Dict[int, asyncio.Future] = {}
+        loop.add_reader(self._ep.fileno(), self._drain)
+
+    def watch(self, fd: int, fut: asyncio.Future):
+        self._pending[fd] = fut
+        try:
+            self._ep.register(fd, select.EPOLLOUT | select.EPOLLONESHOT)
+        except FileExistsError:
+            self._ep.modify(fd, select.EPOLLOUT | select.EPOLLONESHOT)
+
+    def forget(self, fd: int):
+        # Closing the socket drops it from the epoll set on its own
+        self._pending.pop(fd, None)
+
+    def _drain(self):
+        pending = self._pending
+        for fd, _events in self._ep.poll(0):
+            fut = pending.pop(fd, None)
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+
+    def close(self):
+        self._loop.remove_reader(self._ep.fileno())
+        self._ep.close()
+        self._pending.clear()
+
+
+async def _raw_connect(loop: asyncio.AbstractEventLoop, sock: socket.socket,
+                       ip: str, port: int, timeout_s: float,
+                       waiter: Optional[_EpollWaiter] = None) -> int:
+    # Returns the connect errno (0 when established), raising only on timeout
+    err = sock.connect_ex((ip, port))
+    if err in _CONNECT_PENDING:
+        fd = sock.fileno()
+        fut = loop.create_future()
+        if waiter is not None:
+            waiter.watch(fd, fut)
+        else:
+            loop.add_writer(fd, _wake, fut)
+        timer = loop.call_later(timeout_s, _expire, fut)
+        try:
+            await fut
+        finally:
+            if waiter is not None:
+                waiter.forget(fd)
+            else:
+                loop.remove_writer(fd)
+            timer.cancel()
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    return err
+
+
+# errno -> outcome in one dict lookup; anything unlisted counts as filtered
+_ERRNO_STATE: Dict[int, int] = {
+    **dict.fromkeys(_BACKOFF_ERRNOS, BACKOFF),
+    **dict.fromkeys(_RETRYABLE_ERRNOS, TIMEOUT),
+    **dict.fromkeys(_REFUSED_ERRNOS, CLOSED),
 }
 
 
-async def connect_probe(ip: str, port: int, timeout_s: float) -> str:
-    loop = asyncio.get_running_loop()
-    fam = _sock_family(ip)
+def _classify(e: OSError) -> int:
+    return _ERRNO_STATE.get(e.errno, FILTERED)
+
+
+# Linux can create sockets already non-blocking, saving fcntl() calls
+_SOCK_NONBLOCK = getattr(socket, "SOCK_NONBLOCK", 0)
+
+
+def _new_socket(fam: int) -> socket.socket:
+    if _SOCK_NONBLOCK:
+        return socket.socket(fam, socket.SOCK_STREAM | _SOCK_NONBLOCK)
     sock = socket.socket(fam, socket.SOCK_STREAM)
     sock.setblocking(False)
+    return sock
+
+
+_POOL_BATCH = 64
+# How often the pool is topped back up to a full batch in the background
+_POOL_REFILL_S = 0.01
+
+
+class _SocketPool:
+    # Non-blocking sockets per family, created in batches ahead of the probes
+
+    def __init__(self, batch: int = _POOL_BATCH):
+        self._batch = batch
+        self._free: Dict[int, List[socket.socket]] = {}
+
+    def take(self, fam: int) -> socket.socket:
+        free = self._free.get(fam)
+        if not free:
+            free = self._free[fam] = []
+            self._refill(fam, free)
+        return free.pop()
+
+    def top_up(self):
+        # Refill each family in use to a full batch, off the probe path
+        for fam, free in self._free.items():
+            if len(free) < self._batch:
+                try:
+                    self._refill(fam, free)
+                except OSError:
+                    pass
+
+    def _refill(self, fam: int, free: List[socket.socket]):
+        for _ in range(self._batch - len(free)):
+            try:
+                free.append(_new_socket(fam))
+            except OSError:
+                # Out of descriptors: hand out what we have, fail only if none
+                if not free:
+                    raise
+                return
+
+    def close(self):
+        for free in self._free.values():
+            for sock in free:
+                sock.close()
+        self._free.clear()
+
+
+# struct linger {on, 0 seconds}; Winsock declares both fields u_short
+_LINGER_RESET = struct.pack("HH" if sys.platform == "win32" else "ii", 1, 0)
+
+
+async def connect_probe(ip: str, fam: int, port: int, timeout_s: float,
+                        pool: Optional[_SocketPool] = None,
+                        waiter: Optional[_EpollWaiter] = None) -> int:
+    loop = asyncio.get_running_loop()
+    try:
+        sock = pool.take(fam) if pool is not None else _new_socket(fam)
+    except OSError as e:
+        # Out of descriptors/buffers: classified like a failed connect
+        return _classify(e)
 
     try:
-        await asyncio.sleep(_jitter_seconds(ip, port))
-        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout=timeout_s)
-        return "open"
-    except asyncio.TimeoutError:
-        return "timeout"
-    except (ConnectionRefusedError, OSError) as e:
-        code = getattr(e, "errno", None)
-        if isinstance(e, ConnectionRefusedError) or code in {errno.ECONNREFUSED, 10061}:
-            return "closed"
-        if code in _RETRYABLE_ERRNOS:
-            return "timeout"
-        return "filtered"
+        if _RAW_CONNECT:
+            # Failures come back as an errno, not a raised OSError
+            err = await _raw_connect(loop, sock, ip, port, timeout_s, waiter)
+            if err:
+                return _ERRNO_STATE.get(err, FILTERED)
+        else:
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout=timeout_s)
+        # Established: close with an RST so no TIME_WAIT holds a local port
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        except OSError:
+            pass
+        return OPEN
+    except _TimeoutError:
+        return TIMEOUT
+    except OSError as e:
+        return _classify(e)
     finally:
-        with contextlib.suppress(Exception):
+        # Plain try/except: no context-manager object per probe
+        try:
             sock.close()
+        except OSError:
+            pass
 
 
 # ═══════════════════════════════════════════════════════════════
 #  Scanner
 # ═══════════════════════════════════════════════════════════════
 
+def _mark_open(bits: bytearray, port: int) -> bool:
+    i = port >> 3
+    m = 1 << (port & 7)
+    if bits[i] & m:
+        return False
+    bits[i] |= m
+    return True
+
+
+def _bitmap_ports(bits: Optional[bytearray]) -> List[int]:
+    if bits is None:
+        return []
+    out: List[int] = []
+    for i, byte in enumerate(bits):
+        if not byte:
+            continue
+        base = i << 3
+        for j in range(8):
+            if byte & (1 << j):
+                out.append(base + j)
+    return out
+
+
+_IP_MAJOR_MIN_TARGETS = 64
+# How often buffered open lines are written out during a pass
+_FLUSH_INTERVAL_S = 0.01
+
+# AIMD window on in-flight probes, cut on local resource errors
+_BACKOFF_S = 0.05
+_MIN_WINDOW = 8
+_WINDOW_CUT = 0.7
+_WINDOW_GROW_EVERY = 200
+_WINDOW_GROW_STEP = 4
+# Repeats of one probe before a persistent local error is reported as a timeout
+_BACKOFF_TRIES = 3
+
+
+# Descriptors kept back from --concurrency for stdio, the event loop and DNS
+_FD_RESERVE = 64
+# Without getrlimit (Windows) keep the historical ceiling
+_DEFAULT_MAX_CONC = 1024
+# macOS reports an unlimited hard cap but rejects a soft limit above OPEN_MAX
+_OPEN_MAX_FALLBACK = 10240
+
+
+def _raise_fd_limit():
+    # Every in-flight connect holds a descriptor: lift the soft cap to the hard one
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY:
+        wants = (hard, _OPEN_MAX_FALLBACK)
+    else:
+        wants = (hard,)
+    for want in wants:
+        if soft == resource.RLIM_INFINITY or (want != resource.RLIM_INFINITY and want <= soft):
+            return
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (want, hard))
+            return
+        except (ValueError, OSError):
+            continue
+
+
+def _max_concurrency() -> int:
+    if resource is None:
+        return _DEFAULT_MAX_CONC
+    soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    if soft == resource.RLIM_INFINITY:
+        soft = _OPEN_MAX_FALLBACK
+    return max(1, soft - _FD_RESERVE)
+
+
 class Scanner:
     def __init__(self, targets: List[str], ports: List[int],
                  conc: int = 300, tfast: float = 0.30, tslow: float = 1.00,
-                 retry: bool = True, quiet: bool = False):
+                 retry: bool = True, quiet: bool = False,
+                 ip_major: Optional[bool] = None):
         self.targets = targets
         self.ports = order_ports(ports)
-        self.conc = max(1, min(int(conc), 1024))
+        self.conc = max(1, min(int(conc), _max_concurrency()))
         self.tfast = float(tfast)
         self.tslow = float(tslow)
         self.retry = bool(retry)
         self.quiet = bool(quiet)
+        # Many hosts: finish one host's ports before moving to the next
+        if ip_major is None:
+            ip_major = len(targets) > _IP_MAJOR_MIN_TARGETS
+        self.ip_major = bool(ip_major)
 
         self.resolver = Resolver()
 
-        self.dns_failed: Set[int] = set()
+        # 1 while a target is scannable, 0 once its DNS lookup has failed
+        self._target_active = bytearray(b"\x01" * len(targets))
         self.ips_by_target: List[List[str]] = [[] for _ in targets]
 
-        self.opens_by_target: List[Set[int]] = [set() for _ in targets]
-        self.timeouts: Set[Tuple[int, str, int]] = set()
+        # Per-target open-port bitmaps, allocated on the first open only
+        self.opens_by_target: List[Optional[bytearray]] = [None] * len(targets)
 
         self._probes_done = 0
         self._probes_total = 0
@@ -349,6 +815,7 @@ class Scanner:
 
         self._last_progress_t = 0.0
         self._progress_active = False
+        self._pending_output: List[str] = []
 
     def _clear_progress(self):
         if self._progress_active and _IS_TTY:
@@ -356,14 +823,24 @@ class Scanner:
             sys.stderr.flush()
             self._progress_active = False
 
-    def _maybe_progress(self, label: str):
-        if self.quiet or not _IS_TTY:
+    def _flush_output(self):
+        if not self._pending_output:
             return
+        self._clear_progress()
+        sys.stdout.write("".join(self._pending_output))
+        sys.stdout.flush()
+        self._pending_output.clear()
+
+    def _maybe_progress(self, label: str):
         now = time.monotonic()
         if now - self._last_progress_t < 1.0:
             return
         self._last_progress_t = now
 
+        self._flush_output()
+        if self.quiet or not _IS_TTY:
+            return
+
         done = self._probes_done
         total = self._probes_total
         if total <= 0:
@@ -380,160 +857,368 @@ class Scanner:
         sys.stderr.flush()
         self._progress_active = True
 
+    async def _flusher(self, show_progress: bool):
+        # Opens and the progress bar are written from here, off the probe path
+        while True:
+            await asyncio.sleep(_FLUSH_INTERVAL_S)
+            if self._pending_output:
+                self._flush_output()
+                self._last_progress_t = 0.0  # redraw the bar the flush cleared
+            if show_progress:
+                self._maybe_progress("Scan")
+
+    async def _refiller(self, pool: _SocketPool):
+        while True:
+            await asyncio.sleep(_POOL_REFILL_S)
+            pool.top_up()
+
     def _emit_open(self, target: str, port: int):
         svc = _svc(port)
         svc_part = f"  {svc}" if svc else ""
-        self._clear_progress()
-        print(
+        self._pending_output.append(
             f" {_c_green('>>')} {target}:{_c_bold(str(port))}"
-            f"  {_c_green('open')}{_c_dim(svc_part)}"
+            f"  {_c_green('open')}{_c_dim(svc_part)}\n"
         )
 
-    async def resolve_all(self):
-        for i, t in enumerate(self.targets):
+    def _record_open(self, ti: int, t: str, port: int):
+        bits = self.opens_by_target[ti]
+        if bits is None:
+            bits = self.opens_by_target[ti] = bytearray(_PORT_SPACE >> 3)
+        if not _mark_open(bits, port):
+            return
+        self._open_total += 1
+        if not self.quiet:
+            self._emit_open(t, port)
+
+    def open_ports(self, ti: int) -> List[int]:
+        return _bitmap_ports(self.opens_by_target[ti])
+
+    def _set_ips(self, i: int, ips: List[str]):
+        t = self.targets[i]
+        if not ips:
+            self._target_active[i] = 0
+            self.ips_by_target[i] = []
+            if not self.quiet:
+                print(f"  {_c_red('!')} {t} — DNS resolution failed, skipping")
+        else:
+            self.ips_by_target[i] = ips
+            if not self.quiet and t != ips[0]:
+                print(_c_dim(f"  > {t} -> {', '.join(ips)}"))
+
+    async def _lookup(self, t: str, sem: asyncio.Semaphore) -> List[str]:
+        async with sem:
             ips = await self.resolver.resolve(t)
             if not ips:
                 await asyncio.sleep(0.1)
                 ips = await self.resolver.resolve(t)
-            if not ips:
-                self.dns_failed.add(i)
-                self.ips_by_target[i] = []
-                if not self.quiet:
-                    print(f"  {_c_red('!')} {t} — DNS resolution failed, skipping")
-            else:
-                self.ips_by_target[i] = ips
-                if not self.quiet and t != ips[0]:
-                    print(_c_dim(f"  > {t} -> {', '.join(ips)}"))
-
-    async def _run_pass(self, timeout_s: float, pass_id: int):
-        label = "Scan" if pass_id == 1 else "Retry"
-        q: asyncio.Queue = asyncio.Queue(maxsize=max(1, self.conc * 4))
-
-        # Compute total probes for this pass up-front (stable progress)
-        if pass_id == 1:
-            ip_count = 0
-            for ti in range(len(self.targets)):
-                if ti in self.dns_failed:
-                    continue
-                ip_count += len(self.ips_by_target[ti])
-            self._probes_total += ip_count * len(self.ports)
-
-        async def producer():
-            for port in self.ports:
-                for ti, t in enumerate(self.targets):
-                    if ti in self.dns_failed:
-                        continue
-                    for ip in self.ips_by_target[ti]:
-                        await q.put((ti, t, ip, port))
-            for _ in range(self.conc):
-                await q.put(None)
-
-        async def worker():
-            while True:
-                item = await q.get()
-                if item is None:
-                    q.task_done()
-                    return
-                ti, t, ip, port = item
-                try:
-                    state = await connect_probe(ip, port, timeout_s)
-                    self._probes_done += 1
-
-                    if state == "open":
-                        if port not in self.opens_by_target[ti]:
-                            self.opens_by_target[ti].add(port)
-                            self._open_total += 1
-                            if not self.quiet:
-                                self._emit_open(t, port)
-                    elif state == "timeout":
-                        self._timeout_count += 1
-                        if self.retry and pass_id == 1:
-                            self.timeouts.add((ti, ip, port))
-
-                    self._maybe_progress(label)
-                finally:
-                    q.task_done()
-
-        workers = [asyncio.create_task(worker()) for _ in range(self.conc)]
-        prod = asyncio.create_task(producer())
-
-        await prod
-        await q.join()
+        return ips
 
+    async def resolve_all(self):
+        # Numeric targets answer inline; hostnames are looked up concurrently
+        results: List[Optional[List[str]]] = [
+            self.resolver.resolve_cached(t) for t in self.targets
+        ]
+        pending = [i for i, ips in enumerate(results) if ips is None]
+        if pending:
+            sem = asyncio.Semaphore(_DNS_CONCURRENCY)
+            found = await asyncio.gather(*(self._lookup(self.targets[i], sem) for i in pending))
+            for i, ips in zip(pending, found):
+                results[i] = ips
+
+        for i, ips in enumerate(results):
+            self._set_ips(i, ips)
+
+    def _active_targets(self) -> List[int]:
+        return [ti for ti, a in enumerate(self._target_active) if a]
+
+    def _probe_slots(self) -> Tuple[array, List[str], array]:
+        # Every address to probe, as parallel arrays: target index, address, family
+        slot_ti = array("i")
+        slot_ip: List[str] = []
+        slot_fam = array("i")
+        for ti in self._active_targets():
+            for ip in self.ips_by_target[ti]:
+                slot_ti.append(ti)
+                slot_ip.append(ip)
+                slot_fam.append(_ip_family(ip))
+        return slot_ti, slot_ip, slot_fam
+
+    async def _run_pass(self, slot_ti: array, slot_ip: List[str], slot_fam: array):
+        show_progress = not self.quiet and _IS_TTY
+        pool = _SocketPool()
+        waiter = _EpollWaiter(asyncio.get_running_loop()) if _RAW_CONNECT and _EPOLL else None
+        ports = array("H", self.ports)
+        n_slots = len(slot_ip)
+        n_ports = len(ports)
+        ip_major = self.ip_major
+
+        # Compute total probes up-front (stable progress); retries add to it
+        total = n_slots * n_ports
+        self._probes_total += total
+        next_k = 0
+
+        # Per-address smoothed RTT and variance (RFC 6298); srtt < 0 means no sample
+        now = asyncio.get_running_loop().time
+        slot_srtt = array("d", [-1.0]) * n_slots
+        slot_rttvar = array("d", [0.0]) * n_slots
+
+        conc = self.conc
+        window = conc
+        inflight = 0
+        grown = 0
+        # Wakes workers parked above the window; replaced after each set()
+        reopened = asyncio.Event()
+
+        async def park(wid: int):
+            while wid >= window and next_k < total:
+                await reopened.wait()
+
+        async def after_backoff(wid: int, ip: str, fam: int, port: int, timeout_s: float) -> int:
+            # Local resources ran out: shrink the window, then repeat the probe
+            nonlocal window, grown
+            for _ in range(_BACKOFF_TRIES):
+                if inflight <= _MIN_WINDOW:
+                    # Nearly idle and still failing: waiting won't help
+                    break
+                if inflight < window:
+                    window = max(_MIN_WINDOW, int(inflight * _WINDOW_CUT))
+                    grown = 0
+                await asyncio.sleep(_BACKOFF_S)
+                await park(wid)
+                state = await probe(ip, fam, port, timeout_s)
+                if state != BACKOFF:
+                    return state
+            return TIMEOUT
+
+        async def probe(ip: str, fam: int, port: int, timeout_s: float) -> int:
+            nonlocal inflight
+            inflight += 1
+            try:
+                return await connect_probe(ip, fam, port, timeout_s, pool, waiter)
+            finally:
+                inflight -= 1
+
+        # Long-lived workers claim probes by bumping one shared index
+        async def worker(wid: int):
+            nonlocal next_k, window, grown, reopened
+            while next_k < total:
+                if wid >= window:
+                    await park(wid)
+                    continue
+                k = next_k
+                next_k = k + 1
+                if ip_major:
+                    si, pi = divmod(k, n_ports)
+                else:
+                    # Start each port's sweep one host further along
+                    pi, si = divmod(k, n_slots)
+                    si = (si + pi) % n_slots
+                ip = slot_ip[si]
+                fam = slot_fam[si]
+                port = ports[pi]
+
+                t0 = now()
+                state = await probe(ip, fam, port, self.tfast)
+                self._probes_done += 1
+
+                if state == BACKOFF:
+                    state = await after_backoff(wid, ip, fam, port, self.tfast)
+                else:
+                    if window < conc:
+                        grown += 1
+                        if grown >= _WINDOW_GROW_EVERY:
+                            window = min(conc, window + _WINDOW_GROW_STEP)
+                            grown = 0
+                            reopened.set()
+                            reopened = asyncio.Event()
+                    if state <= CLOSED:  # answered: OPEN or CLOSED
+                        sample = now() - t0
+                        srtt = slot_srtt[si]
+                        if srtt < 0:
+                            slot_srtt[si] = sample
+                            slot_rttvar[si] = sample / 2
+                        else:
+                            slot_rttvar[si] = 0.75 * slot_rttvar[si] + 0.25 * abs(srtt - sample)
+                            slot_srtt[si] = 0.875 * srtt + 0.125 * sample
+
+                if state == TIMEOUT:
+                    self._timeout_count += 1
+                    if self.retry:
+                        # Retry in place, within the host's RTO once it has answered
+                        srtt = slot_srtt[si]
+                        if srtt < 0:
+                            t_retry = self.tslow
+                        else:
+                            rto = srtt + 4 * slot_rttvar[si]
+                            t_retry = min(self.tslow, max(self.tfast, rto))
+                        self._probes_total += 1
+                        state = await probe(ip, fam, port, t_retry)
+                        if state == BACKOFF:
+                            state = await after_backoff(wid, ip, fam, port, t_retry)
+                        self._probes_done += 1
+                        if state == TIMEOUT:
+                            self._timeout_count += 1
+
+                if state == OPEN:
+                    ti = slot_ti[si]
+                    self._record_open(ti, self.targets[ti], port)
+
+            # Nothing left to claim: release anyone still parked
+            reopened.set()
+
+        workers = [asyncio.create_task(worker(wid)) for wid in range(min(conc, total))]
+        flusher = asyncio.create_task(self._flusher(show_progress))
+        refiller = asyncio.create_task(self._refiller(pool))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            flusher.cancel()
+            refiller.cancel()
+            for w in workers:
+                w.cancel()
+            pool.close()
+            if waiter is not None:
+                waiter.close()
+
+        self._flush_output()
         self._clear_progress()
 
-        for w in workers:
-            w.cancel()
-        for w in workers:
-            with contextlib.suppress(asyncio.CancelledError):
-                await w
-
     async def run(self):
         await self.resolve_all()
 
-        active_targets = len(self.targets) - len(self.dns_failed)
-        if active_targets == 0:
+        if not any(self._target_active):
             if not self.quiet:
                 print("  No resolvable targets — nothing to scan.")
             return
 
-        await self._run_pass(self.tfast, pass_id=1)
+        await self._run_pass(*self._probe_slots())
 
-        if not self.retry or not self.timeouts:
-            return
 
-        if not self.quiet:
-            print(
-                _c_dim(f"  [*] Retrying {len(self.timeouts):,} timed-out probes "
-                       f"with {self.tslow:.2f}s timeout...")
-            )
+# ═══════════════════════════════════════════════════════════════
+#  Multi-process sharding
+# ═══════════════════════════════════════════════════════════════
 
-        # Retry pass probe total
-        self._probes_total += len(self.timeouts)
+# Below this many targets per process, spawn cost outweighs the extra CPU
+_MIN_TARGETS_PER_PROC = 4
+_SHARD_TICK_S = 0.5
 
-        q: asyncio.Queue = asyncio.Queue(maxsize=max(1, self.conc * 4))
 
-        async def producer2():
-            for (ti, ip, port) in self.timeouts:
-                await q.put((ti, self.targets[ti], ip, port))
-            for _ in range(self.conc):
-                await q.put(None)
+class _ShardScanner(Scanner):
+    # Scans one slice of the targets, reporting back over a queue
 
-        async def worker2():
-            while True:
-                item = await q.get()
-                if item is None:
-                    q.task_done()
-                    return
-                ti, t, ip, port = item
-                try:
-                    state = await connect_probe(ip, port, self.tslow)
-                    self._probes_done += 1
-                    if state == "open":
-                        if port not in self.opens_by_target[ti]:
-                            self.opens_by_target[ti].add(port)
-                            self._open_total += 1
-                            if not self.quiet:
-                                self._emit_open(t, port)
-                    elif state == "timeout":
-                        self._timeout_count += 1
-                    self._maybe_progress("Retry")
-                finally:
-                    q.task_done()
-
-        workers2 = [asyncio.create_task(worker2()) for _ in range(self.conc)]
-        prod2 = asyncio.create_task(producer2())
-
-        await prod2
-        await q.join()
+    def __init__(self, shard: int, offset: int, queue, *args, **kwargs):
+        super().__init__(*args, quiet=True, **kwargs)
+        self._shard = shard
+        self._offset = offset
+        self._queue = queue
 
-        self._clear_progress()
+    def _set_ips(self, i: int, ips: List[str]):
+        super()._set_ips(i, ips)
+        # The parent only prints failures and names that resolved elsewhere
+        if not ips or ips[0] != self.targets[i]:
+            self._queue.put(("dns", self._offset + i, ips))
+
+    def _record_open(self, ti: int, t: str, port: int):
+        before = self._open_total
+        super()._record_open(ti, t, port)
+        if self._open_total != before:
+            self._queue.put(("open", self._offset + ti, port))
+
+    def _report(self, kind: str):
+        self._queue.put((kind, self._shard, self._probes_done,
+                         self._probes_total, self._timeout_count))
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(_SHARD_TICK_S)
+            self._report("progress")
+
+    async def run(self):
+        ticker = asyncio.create_task(self._tick())
+        try:
+            await super().run()
+        finally:
+            ticker.cancel()
+        self._report("done")
+
+
+def _scan_shard(shard: int, offset: int, targets: List[str], ports: List[int],
+                opts: Dict[str, object], queue):
+    scanner = _ShardScanner(shard, offset, queue, targets, ports, **opts)
+    try:
+        _run(scanner.run())
+    except KeyboardInterrupt:
+        pass
+
+
+def _shard_count(procs: int, n_targets: int) -> int:
+    if procs <= 0:
+        procs = os.cpu_count() or 1
+    return max(1, min(procs, n_targets // _MIN_TARGETS_PER_PROC))
+
+
+def _run_sharded(scanner: Scanner, n_shards: int):
+    # Scan contiguous slices of the targets in separate processes
+    targets = scanner.targets
+    opts = dict(conc=max(1, scanner.conc // n_shards), tfast=scanner.tfast,
+                tslow=scanner.tslow, retry=scanner.retry, ip_major=scanner.ip_major)
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+
+    step = -(-len(targets) // n_shards)
+    workers = []
+    spans = []
+    for shard, offset in enumerate(range(0, len(targets), step)):
+        end = min(offset + step, len(targets))
+        proc = ctx.Process(
+            target=_scan_shard,
+            args=(shard, offset, targets[offset:end], scanner.ports, opts, queue),
+            daemon=True,
+        )
+        proc.start()
+        workers.append(proc)
+        spans.append((offset, end))
+
+    stats: Dict[int, Tuple[int, int, int]] = {}
+    finished = set()
+    running = len(workers)
+    try:
+        while running:
+            try:
+                msg = queue.get(timeout=_SHARD_TICK_S)
+            except _queue.Empty:
+                if not any(w.is_alive() for w in workers):
+                    break
+                continue
+
+            kind = msg[0]
+            if kind == "open":
+                _, ti, port = msg
+                scanner._record_open(ti, targets[ti], port)
+            elif kind == "dns":
+                _, ti, ips = msg
+                scanner._set_ips(ti, ips)
+            else:
+                _, shard, done, total, timeouts = msg
+                stats[shard] = (done, total, timeouts)
+                scanner._probes_done = sum(v[0] for v in stats.values())
+                scanner._probes_total = sum(v[1] for v in stats.values())
+                scanner._timeout_count = sum(v[2] for v in stats.values())
+                if kind == "done":
+                    finished.add(shard)
+                    running -= 1
+            scanner._maybe_progress("Scan")
+    finally:
+        scanner._flush_output()
+        scanner._clear_progress()
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+            w.join()
 
-        for w in workers2:
-            w.cancel()
-        for w in workers2:
-            with contextlib.suppress(asyncio.CancelledError):
-                await w
+    # Shards that died before reporting "done": (shard, exit code, first, end)
+    return [(shard, w.exitcode, *spans[shard])
+            for shard, w in enumerate(workers) if shard not in finished]
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -545,12 +1230,12 @@ def _render_summary(scanner: Scanner, targets: List[str],
 
     if quiet:
         for i, t in enumerate(targets):
-            for p in sorted(scanner.opens_by_target[i]):
+            for p in scanner.open_ports(i):
                 print(f"{t}:{p}\topen\t{_svc(p)}")
         return
 
-    total_open = sum(len(s) for s in scanner.opens_by_target)
-    hosts_with_open = sum(1 for s in scanner.opens_by_target if s)
+    total_open = scanner._open_total
+    hosts_with_open = sum(1 for s in scanner.opens_by_target if s is not None)
     multi = len(targets) > 1
 
     print(f"\n{'─' * 64}")
@@ -581,7 +1266,7 @@ def _render_summary(scanner: Scanner, targets: List[str],
                           "target may be firewalled, or try reducing --concurrency")
             )
 
-    dns_failed = len(scanner.dns_failed)
+    dns_failed = scanner._target_active.count(0)
     if dns_failed:
         print(_c_yellow(f"  [!] DNS failed for {dns_failed} target(s)"))
 
@@ -599,11 +1284,11 @@ def _render_summary(scanner: Scanner, targets: List[str],
 
 def _render_table(scanner: Scanner, targets: List[str]):
     for i, t in enumerate(targets):
-        if i in scanner.dns_failed:
+        if not scanner._target_active[i]:
             print(f"  {t}  — {_c_red('DNS failed')}")
             continue
 
-        opens = sorted(scanner.opens_by_target[i])
+        opens = scanner.open_ports(i)
         if not opens:
             print(f"  {t}  — no open ports")
             continue
@@ -625,9 +1310,9 @@ def _render_table(scanner: Scanner, targets: List[str]):
 def _render_multi_lines(scanner: Scanner, targets: List[str]):
     # Old-style: one host per line, clean and easy to grep/parse.
     for i, t in enumerate(targets):
-        if i in scanner.dns_failed:
+        if not scanner._target_active[i]:
             continue
-        opens = sorted(scanner.opens_by_target[i])
+        opens = scanner.open_ports(i)
         if not opens:
             continue
         port_str = ", ".join(_port_label(p) for p in opens)
@@ -639,6 +1324,17 @@ def _render_multi_lines(scanner: Scanner, targets: List[str]):
 #  Entry point
 # ═══════════════════════════════════════════════════════════════
 
+def _run(coro):
+    # libuv-backed loops make every connect, writer callback and timer cheaper.
+    if _fastloop is None:
+        return asyncio.run(coro)
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=_fastloop.new_event_loop) as runner:
+            return runner.run(coro)
+    _fastloop.install()
+    return asyncio.run(coro)
+
+
 def main():
     global _COLOR, _IS_TTY
     if _COLORAMA:
@@ -660,13 +1356,23 @@ def main():
     ap.add_argument("--tfast", type=float, default=0.30,
                     help="Fast timeout seconds (default 0.30)")
     ap.add_argument("--tslow", type=float, default=1.00,
-                    help="Slow retry timeout seconds (default 1.00)")
+                    help="Slow retry timeout seconds; retries against a host that has "
+                         "answered wait its measured RTO instead, up to this (default 1.00)")
     ap.add_argument("--no-retry", action="store_true",
-                    help="Disable slow retry pass")
+                    help="Disable slow retry of timed-out probes")
     ap.add_argument("-q", "--quiet", action="store_true",
                     help="Only print opens (suppress info lines)")
+    ap.add_argument("--order", choices=("auto", "port", "ip"), default="auto",
+                    help="Probe order: 'port' sweeps each port across all hosts, "
+                         "'ip' finishes one host before the next "
+                         f"(default auto: ip above {_IP_MAJOR_MIN_TARGETS} targets)")
+    ap.add_argument("--procs", type=int, default=1,
+                    help="Worker processes to shard large target lists across "
+                         "(default 1; 0 = one per CPU)")
     args = ap.parse_args()
 
+    _raise_fd_limit()
+
     targets: List[str] = []
     if os.path.isfile(args.target):
         with open(args.target, "r", encoding="utf-8") as f:
@@ -686,6 +1392,17 @@ def main():
 
     _warm_service_cache(ports)
 
+    scanner = Scanner(
+        targets=targets,
+        ports=ports,
+        conc=args.concurrency,
+        tfast=args.tfast,
+        tslow=args.tslow,
+        retry=(not args.no_retry),
+        quiet=args.quiet,
+        ip_major={"auto": None, "port": False, "ip": True}[args.order],
+    )
+
     if not args.quiet:
         port_desc = _describe_port_spec(args.ports, len(ports))
         tgt_preview = ""
@@ -698,31 +1415,36 @@ def main():
         print(f"  Porter — TCP Connect Scanner")
         print(f"  Targets    : {len(targets)} host{'s' if len(targets) != 1 else ''}{tgt_preview}")
         print(f"  Ports      : {port_desc}")
-        print(f"  Concurrency: {args.concurrency}   "
+        print(f"  Concurrency: {scanner.conc}   "
               f"Timeouts: {args.tfast:.2f}s / {args.tslow:.2f}s   "
               f"Retry: {'on' if not args.no_retry else 'off'}")
         print(f"{'─' * 64}\n")
 
-    scanner = Scanner(
-        targets=targets,
-        ports=ports,
-        conc=args.concurrency,
-        tfast=args.tfast,
-        tslow=args.tslow,
-        retry=(not args.no_retry),
-        quiet=args.quiet,
-    )
+    n_shards = _shard_count(args.procs, len(targets))
 
+    lost: List[Tuple[int, Optional[int], int, int]] = []
     t0 = time.perf_counter()
     try:
-        asyncio.run(scanner.run())
+        if n_shards > 1:
+            lost = _run_sharded(scanner, n_shards)
+        else:
+            _run(scanner.run())
     except KeyboardInterrupt:
+        scanner._flush_output()
         scanner._clear_progress()
         print(f"\n  {_c_yellow('[!] Aborted.')}")
     dt = time.perf_counter() - t0
 
     _render_summary(scanner, targets, dt, args.ports, args.quiet)
 
+    if lost:
+        for shard, code, lo, hi in lost:
+            span = targets[lo] if hi - lo == 1 else f"{targets[lo]} .. {targets[hi - 1]}"
+            print(_c_red(f"  [!] Shard {shard} died (exit code {code}); "
+                         f"results incomplete for {hi - lo} target(s): {span}"),
+                  file=sys.stderr)
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()